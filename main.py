@@ -1,129 +1,538 @@
 import re
 import json
-import requests
+import gzip
+import atexit
+import asyncio
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+import pathlib
+import shutil
+import tarfile
+import urllib.request
+import functools
+import contextlib
+import aiohttp
+import orjson
 from bs4 import BeautifulSoup # Kept for potential future use or fallback, though not primary for extraction now
 import tldextract
-from flask import Flask, request, render_template_string
+from flask import Flask, Response, request
 from flask_socketio import SocketIO, emit
-from playwright.sync_api import sync_playwright # Added for Playwright
+from playwright.async_api import async_playwright # Added for Playwright
 
 # --- Configuration ---
 # Consider making these configurable if needed
 PLAYWRIGHT_TIMEOUT = 60000  # 60 seconds for page load
+SETTLE_QUIET_TIME = 2.0     # Seconds without new requests before a page counts as settled
+SETTLE_MAX_TIME = 8.0       # Upper bound on settling after DOMContentLoaded, for pages that beacon forever
+SETTLE_POLL_INTERVAL = 0.5  # Seconds between request-count checks while settling
 REQUESTS_TIMEOUT_DDG = 10   # 10 seconds for DuckDuckGo API requests
+INDEX_CACHE_MAX_AGE = 86400 # Seconds browsers may cache the static index page
 USER_AGENT = "tracker-audit/1.1" # Updated user agent
+LOG_LEVEL = logging.INFO    # Set to logging.DEBUG for per-domain and per-request detail
+BROWSER_POOL_SIZE = 2       # Warm Chromium instances; each scan checks one out, so this caps concurrent scans
+MAX_PARALLEL_DDG = 16       # Max in-flight DuckDuckGo lookups across all scans
+DDG_POOL_SIZE = 32          # Keep-alive connections to raw.githubusercontent.com shared by all scans
+DDG_RETRIES = 2             # Extra attempts for transient failures (connection errors, 502/503/504)
+DDG_RETRY_BACKOFF = 0.2     # Seconds; doubled after each retry
+DDG_RETRY_STATUSES = frozenset({502, 503, 504})
+DDG_CACHE_DIR = pathlib.Path(__file__).with_name(".ddg_cache") # On-disk tracker-radar cache, one JSON file per domain
+DDG_CACHE_TTL = 24 * 60 * 60 # Seconds before a cached DDG response (hit or 404) is re-fetched
+DDG_MEMORY_CACHE_SIZE = 4096 # Max domains kept in the in-process cache
+TOP_TRACKERS_FILE = pathlib.Path(__file__).with_name("top_trackers.txt") # Domains pre-fetched at startup
+TRACKER_RADAR_TARBALL_URL = "https://codeload.github.com/duckduckgo/tracker-radar/tar.gz/refs/heads/main"
+TRACKER_RADAR_DIR = DDG_CACHE_DIR / "tracker-radar-US" # Local copy of tracker-radar's domains/US
+TRACKER_RADAR_MAX_AGE = 7 * 24 * 60 * 60 # Seconds before the local copy is re-downloaded
+TRACKER_RADAR_TIMEOUT = 60  # Socket timeout in seconds for the tarball download
+TRACKER_RADAR_RETRY_INTERVAL = 60 * 60 # Seconds before retrying a failed download
+TRACKER_RADAR_MIN_DOMAINS = 1000 # Fewer files than this means the tarball layout changed; the copy is rejected
+# Resource types aborted before download. Their hosts are still recorded because the
+# "request" event fires before routing; only the bytes (and networkidle wait) are skipped.
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media", "stylesheet"})
+SKIPPED_URL_SCHEMES = ("data:", "blob:", "chrome-extension:") # Requests that never have a registrable domain
+
+# Single process-wide extractor using the public suffix list snapshot bundled with
+# tldextract: no network fetch or disk cache on first use, safe to call per request.
+EXTRACT = tldextract.TLDExtract(suffix_list_urls=(), cache_dir=None)
+
+@functools.lru_cache(maxsize=16384)
+def registered_domain(host: str) -> str:
+    """
+    Memoized hostname -> registrable domain. Hosts such as CDNs and ad servers
+    recur across scans, so after the first sighting this is a dict lookup.
+    """
+    return EXTRACT(host).registered_domain
+
+class _OrjsonCodec:
+    """
+    Minimal stand-in for the stdlib json module so SocketIO encodes and decodes
+    packets with orjson. Formatting options such as separators are ignored;
+    orjson output is always compact.
+    """
+    @staticmethod
+    def dumps(obj, *args, **kwargs):
+        return orjson.dumps(obj).decode("utf-8")
+
+    @staticmethod
+    def loads(s, *args, **kwargs):
+        return orjson.loads(s)
+
+# --- Logging ---
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues records unformatted. The stock QueueHandler.prepare() interpolates the
+    message on the calling thread; here that is left to the listener thread, so log
+    arguments must not be mutated after the call (the app only logs str/int/exceptions).
+    """
+    def prepare(self, record):
+        return record
+
+# Records go through a queue; message interpolation, formatting and the write all
+# happen on a listener thread, so logging from the scan hot paths never blocks on stdout.
+logger = logging.getLogger("tracker")
+logger.setLevel(LOG_LEVEL)
+logger.propagate = False
+_log_queue = queue.Queue(-1)
+logger.addHandler(_DeferredQueueHandler(_log_queue))
+_log_stream_handler = logging.StreamHandler()
+_log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_stream_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop) # Registered first, so it runs last and flushes shutdown messages
+
+def read_domain_list(path: pathlib.Path) -> list[str]:
+    """
+    Reads a one-domain-per-line file, skipping blank lines and "#" comments.
+    A missing file is treated as empty.
+    """
+    try:
+        lines = path.read_text(encoding="utf-8").splitlines()
+    except OSError:
+        return []
+    return [line.strip() for line in lines if line.strip() and not line.startswith("#")]
 
-# Initialize Flask app and SocketIO
+# Initialize Flask app and SocketIO.
+# async_mode is pinned to threading: eventlet/gevent (which SocketIO would otherwise
+# pick automatically if installed) monkey-patch threads and sockets, which breaks the
+# Playwright asyncio loop thread below. Concurrent scans already share that loop, so
+# background tasks only block on futures. simple-websocket enables WebSocket transport.
 app = Flask(__name__)
-socketio = SocketIO(app)
+socketio = SocketIO(app, async_mode="threading", json=_OrjsonCodec)
+
+# --- Playwright event loop ---
+# All Playwright work runs on one asyncio loop in a dedicated thread, so scans share a
+# pool of warm Chromium instances instead of launching their own.
+LOOP = asyncio.new_event_loop()
+threading.Thread(target=LOOP.run_forever, name="playwright-loop", daemon=True).start()
+
+_playwright = None
+_browsers = [] # Every browser in the pool, checked out or not
+_BROWSER_POOL = asyncio.Queue() # Browsers currently available for a scan
+_BROWSER_POOL_LOCK = asyncio.Lock()
+_ddg_session = None
+_DDG_SEMAPHORE = asyncio.Semaphore(MAX_PARALLEL_DDG)
+_ddg_cache = {} # domain -> (fetched_at, data); data is None for domains DDG has no entry for
+_FETCH_FAILED = object() # Returned by _fetch_one for transient failures, which are never cached
+_tracker_radar_index = None # domain -> local JSON path once the local copy is loaded; None means use HTTP
+
+async def _launch_browser():
+    # Using chromium, but firefox or webkit are also options
+    return await _playwright.chromium.launch(headless=True) # Set headless=False for debugging if needed
+
+async def _start_browser_pool():
+    """
+    Launches BROWSER_POOL_SIZE browsers on LOOP the first time it is called;
+    later calls return immediately.
+    """
+    global _playwright
+    async with _BROWSER_POOL_LOCK:
+        if _browsers:
+            return
+        if _playwright is None:
+            _playwright = await async_playwright().start()
+        for browser in await asyncio.gather(*(_launch_browser() for _ in range(BROWSER_POOL_SIZE))):
+            _browsers.append(browser)
+            _BROWSER_POOL.put_nowait(browser)
+        logger.info("Playwright browser pool ready (%d browsers).", BROWSER_POOL_SIZE)
+
+@contextlib.asynccontextmanager
+async def _checkout_browser():
+    """
+    Holds a warm browser from the pool for the duration of one scan, waiting if
+    all are busy. A browser that crashed since its last use is replaced first.
+    """
+    await _start_browser_pool()
+    browser = await _BROWSER_POOL.get()
+    try:
+        if not browser.is_connected():
+            logger.warning("Pooled Playwright browser disconnected; relaunching.")
+            replacement = await _launch_browser()
+            _browsers[_browsers.index(browser)] = replacement
+            browser = replacement
+        yield browser
+    finally:
+        _BROWSER_POOL.put_nowait(browser)
+
+async def _stop_browser_pool():
+    global _playwright
+    for browser in _browsers:
+        if browser.is_connected():
+            await browser.close()
+    _browsers.clear()
+    if _playwright is not None:
+        await _playwright.stop()
+    _playwright = None
+
+def _get_ddg_session() -> aiohttp.ClientSession:
+    """
+    Returns the process-wide DDG session, creating it on first use. Reusing it keeps
+    connections (and their TLS handshakes) alive across lookups and across scans.
+    Must be called on LOOP.
+    """
+    global _ddg_session
+    if _ddg_session is None or _ddg_session.closed:
+        _ddg_session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=DDG_POOL_SIZE, limit_per_host=DDG_POOL_SIZE),
+            headers={"User-Agent": USER_AGENT},
+            timeout=aiohttp.ClientTimeout(total=REQUESTS_TIMEOUT_DDG),
+        )
+    return _ddg_session
+
+async def _close_ddg_session():
+    global _ddg_session
+    if _ddg_session is not None and not _ddg_session.closed:
+        await _ddg_session.close()
+    _ddg_session = None
+
+def start_browser_pool():
+    """
+    Warms up the browser pool so scans don't pay Chromium startup cost.
+    """
+    asyncio.run_coroutine_threadsafe(_start_browser_pool(), LOOP).result()
 
-def extract_third_party(url: str) -> list[str]:
+@atexit.register
+def _shutdown():
+    if LOOP.is_running():
+        try:
+            asyncio.run_coroutine_threadsafe(_close_ddg_session(), LOOP).result(timeout=10)
+            asyncio.run_coroutine_threadsafe(_stop_browser_pool(), LOOP).result(timeout=10)
+        except Exception as e:
+            logger.error("Error shutting down shared clients: %s", e)
+
+async def _extract_async(url: str, on_domain=None) -> set[str]:
     """
-    Fetches a URL using Playwright, intercepts network requests,
-    and returns a sorted list of unique third-party registrable domains.
+    Fetches a URL using a pooled Playwright browser, intercepts network requests,
+    and returns the set of unique third-party registrable domains (unordered;
+    sort at presentation time if needed).
+    If given, on_domain is called with each new domain as soon as it is seen.
     """
     if not url.startswith(("http://", "https://")):
         url = "https://" + url.lstrip("/")
 
     try:
-        target_domain_info = tldextract.extract(url)
+        target_domain_info = EXTRACT(url)
         root_domain = target_domain_info.registered_domain
         if not root_domain:
-            print(f"Could not determine root domain for URL: {url}")
-            return []
+            logger.warning("Could not determine root domain for URL: %s", url)
+            return set()
     except Exception as e:
-        print(f"Error extracting domain from input URL {url}: {e}")
-        return []
+        logger.error("Error extracting domain from input URL %s: %s", url, e)
+        return set()
 
     third_party_domains = set()
-    print(f"Starting Playwright scan for: {url}")
+    seen_hosts = set() # Hostnames already classified during this scan
+    first_party_suffix = "." + root_domain
+    request_count = 0 # All requests seen, including filtered ones; used to detect settling
 
-    with sync_playwright() as p:
-        browser = None # Initialize browser to None for robust finally block
+    async with _checkout_browser() as browser:
+        logger.info("Starting Playwright scan for: %s", url)
+        context = None # Initialize context to None for robust finally block
         try:
-            # Using chromium, but firefox or webkit are also options
-            browser = p.chromium.launch(headless=True) # Set headless=False for debugging if needed
-            # Use a new context to ensure isolation and allow for custom settings
-            context = browser.new_context(
+            # Use a new context per scan to ensure isolation and allow for custom settings
+            context = await browser.new_context(
                 user_agent=USER_AGENT,
                 ignore_https_errors=True # Helps with sites using self-signed or problematic SSL certs
             )
-            page = context.new_page()
+            page = await context.new_page()
 
-            # Event handler to capture requests
+            # Event handler to capture requests. Runs for every request the page makes,
+            # so cheap string checks come first and tldextract only sees each host once.
             def handle_request(request_obj):
+                nonlocal request_count
+                request_count += 1
                 request_url = request_obj.url
                 try:
-                    # Filter out data URLs as they don't have a registrable domain
-                    if request_url.startswith("data:"):
+                    if request_obj.resource_type == "preflight" or request_url.startswith(SKIPPED_URL_SCHEMES):
                         return
 
-                    extracted_req_domain_info = tldextract.extract(request_url)
-                    req_domain = extracted_req_domain_info.registered_domain
-                    
-                    if req_domain and req_domain != root_domain and req_domain != "" : # Ensure req_domain is not empty
+                    host = urlsplit(request_url).hostname
+                    if not host or host == root_domain or host.endswith(first_party_suffix):
+                        return # First-party (or no host at all)
+                    if host in seen_hosts:
+                        return
+                    try:
+                        frame_host = urlsplit(request_obj.frame.url).hostname
+                    except Exception:
+                        frame_host = None # Service worker requests have no frame
+                    if host == frame_host:
+                        return # Same-origin to its own frame; the frame's host was recorded when it loaded
+                    seen_hosts.add(host)
+
+                    req_domain = registered_domain(host)
+                    # Empty for IP addresses and bare public suffixes
+                    if req_domain and req_domain not in third_party_domains:
                         third_party_domains.add(req_domain)
+                        if on_domain:
+                            on_domain(req_domain)
                 except Exception as e:
-                    # Log or handle domains that cause errors during extraction
-                    # print(f"Could not process request URL: {request_url} - {e}")
-                    pass # Silently ignore problematic URLs for now
-
-            page.on("request", handle_request)
-
-            print(f"Navigating to {url} with Playwright...")
-            # Navigate to the page and wait for network activity to settle.
-            # 'networkidle' waits until there are no new network connections for 500 ms.
-            # 'load' waits for the load event. 'domcontentloaded' is another option.
-            page.goto(url, wait_until="networkidle", timeout=PLAYWRIGHT_TIMEOUT)
-            print(f"Navigation to {url} complete. Found {len(third_party_domains)} potential third-party domains so far.")
+                    # Problematic URLs are skipped; only pay for formatting when debugging
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("Could not process request URL: %s - %s", request_url, e)
+
+            # Listen on the context rather than the page so requests from subframes,
+            # popups and workers are captured as well
+            context.on("request", handle_request)
+
+            # Abort heavy, tracker-irrelevant resources; scripts, XHR/fetch and documents go through
+            async def handle_route(route):
+                if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+                    await route.abort()
+                else:
+                    await route.continue_()
+
+            await context.route("**/*", handle_route)
+
+            logger.info("Navigating to %s with Playwright...", url)
+            # Navigate to the page, then give it a bounded window for network activity to settle.
+            # Most trackers load by DOMContentLoaded; 'networkidle' can stall until the timeout
+            # on pages that keep beaconing, so it is not used here.
+            await page.goto(url, wait_until="domcontentloaded", timeout=PLAYWRIGHT_TIMEOUT)
+            await _wait_for_settle(lambda: request_count)
+            logger.info("Navigation to %s complete. Found %d potential third-party domains so far.", url, len(third_party_domains))
 
             # You could add additional interactions here if needed, e.g., scrolling to trigger more requests:
-            # page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-            # page.wait_for_timeout(5000) # Wait for new requests to load after scroll
+            # await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+            # await page.wait_for_timeout(5000) # Wait for new requests to load after scroll
 
         except Exception as e:
-            print(f"Error during Playwright operation for {url}: {e}")
+            logger.error("Error during Playwright operation for %s: %s", url, e)
             # Depending on the error, you might want to return an empty list or raise it
         finally:
-            if page:
-                page.close()
+            # Closing the context also closes its pages; the browser goes back to the pool warm
             if context:
-                context.close()
-            if browser and browser.is_connected():
-                browser.close()
-            print(f"Playwright browser closed for {url}.")
-                
-    return sorted(list(third_party_domains))
+                await context.close()
+            logger.info("Playwright context closed for %s.", url)
+
+    return third_party_domains
 
-def lookup_ddg(domains: list[str]) -> list[dict]:
+async def _wait_for_settle(get_request_count):
+    """
+    Returns once no new requests have fired for SETTLE_QUIET_TIME seconds, or after
+    SETTLE_MAX_TIME seconds regardless. Unlike 'networkidle', constant tracker
+    beacons can't keep the scan waiting until PLAYWRIGHT_TIMEOUT.
+    """
+    started = last_change = time.monotonic()
+    last_count = get_request_count()
+    while True:
+        await asyncio.sleep(SETTLE_POLL_INTERVAL)
+        now = time.monotonic()
+        count = get_request_count()
+        if count != last_count:
+            last_count, last_change = count, now
+        elif now - last_change >= SETTLE_QUIET_TIME:
+            return
+        if now - started >= SETTLE_MAX_TIME:
+            return
+
+async def _fetch_one(session: aiohttp.ClientSession, d: str):
     """
-    Fetches DuckDuckGo tracker‐radar metadata for each domain present.
+    Fetches tracker-radar metadata for a single domain. Returns None if DDG has
+    no entry for it, or _FETCH_FAILED if the lookup could not be completed.
+    """
+    # Construct the URL for the raw JSON data from DDG's tracker-radar repository
+    raw_url = f"https://raw.githubusercontent.com/duckduckgo/tracker-radar/main/domains/US/{d}.json"
+    for attempt in range(DDG_RETRIES + 1):
+        if attempt:
+            await asyncio.sleep(DDG_RETRY_BACKOFF * 2 ** (attempt - 1))
+        try:
+            async with session.get(raw_url) as r:
+                if r.status in DDG_RETRY_STATUSES and attempt < DDG_RETRIES:
+                    continue
+                if r.status == 200:
+                    data = orjson.loads(await r.read())
+                    # Ensure the 'domain' field is present, or use the queried domain 'd'
+                    if "domain" not in data:
+                        data["domain"] = d
+                    logger.debug("  Found DDG data for: %s", d)
+                    return data
+                elif r.status == 404:
+                    logger.debug("  No DDG data for: %s (404 Not Found)", d)
+                    return None
+                else:
+                    logger.warning("  DDG lookup for %s failed with status: %d", d, r.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            if attempt < DDG_RETRIES:
+                continue
+            logger.warning("  Request failed for DDG data of %s: %s", d, e)
+        except ValueError as e:
+            logger.warning("  Invalid DDG data for %s: %s", d, e)
+        return _FETCH_FAILED # Continue with the other domains if one fails
+
+def _read_disk_cache(d: str):
+    """
+    Returns (fetched_at, data) for a fresh on-disk entry, or None if missing or stale.
+    """
+    path = DDG_CACHE_DIR / f"{d}.json"
+    try:
+        fetched_at = path.stat().st_mtime
+        if time.time() - fetched_at >= DDG_CACHE_TTL:
+            return None
+        return fetched_at, orjson.loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+def _write_disk_cache(d: str, data):
+    try:
+        DDG_CACHE_DIR.mkdir(exist_ok=True)
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = DDG_CACHE_DIR / f"{d}.json.{threading.get_ident()}.tmp"
+        tmp_path.write_bytes(orjson.dumps(data))
+        tmp_path.replace(DDG_CACHE_DIR / f"{d}.json")
+    except OSError as e:
+        logger.warning("  Could not cache DDG data for %s: %s", d, e)
+
+def _remember(d: str, fetched_at: float, data):
+    if d not in _ddg_cache and len(_ddg_cache) >= DDG_MEMORY_CACHE_SIZE:
+        _ddg_cache.pop(next(iter(_ddg_cache))) # Evict the oldest entry
+    _ddg_cache[d] = (fetched_at, data)
+
+def _download_tracker_radar():
+    """
+    Streams the tracker-radar tarball and extracts only domains/US/*.json into
+    TRACKER_RADAR_DIR, replacing any previous copy once the download succeeds.
+    Raises without touching the previous copy if too few files were extracted.
+    """
+    tmp_dir = TRACKER_RADAR_DIR.with_name(TRACKER_RADAR_DIR.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+    req = urllib.request.Request(TRACKER_RADAR_TARBALL_URL, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(req, timeout=TRACKER_RADAR_TIMEOUT) as resp, \
+            tarfile.open(fileobj=resp, mode="r|gz") as tar:
+        extracted = 0
+        for member in tar:
+            # Members look like "tracker-radar-main/domains/US/example.com.json"
+            parts = member.name.split("/")
+            if member.isfile() and len(parts) == 4 and parts[1:3] == ["domains", "US"] and parts[3].endswith(".json"):
+                (tmp_dir / parts[3]).write_bytes(tar.extractfile(member).read())
+                extracted += 1
+    if extracted < TRACKER_RADAR_MIN_DOMAINS:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise ValueError(f"only {extracted} domains/US files found in tarball (expected at least {TRACKER_RADAR_MIN_DOMAINS})")
+    shutil.rmtree(TRACKER_RADAR_DIR, ignore_errors=True)
+    tmp_dir.replace(TRACKER_RADAR_DIR)
+
+def _build_tracker_radar_index() -> dict:
+    return {path.stem: path for path in TRACKER_RADAR_DIR.glob("*.json")}
+
+async def _load_tracker_radar():
+    """
+    Keeps a local copy of tracker-radar's US domains and indexes it, refreshing it
+    every TRACKER_RADAR_MAX_AGE. Until the first load finishes, lookups use HTTP.
+    """
+    global _tracker_radar_index
+    while True:
+        try:
+            age = time.time() - TRACKER_RADAR_DIR.stat().st_mtime
+        except OSError:
+            age = None
+        if age is None or age >= TRACKER_RADAR_MAX_AGE:
+            logger.info("Downloading DuckDuckGo Tracker Radar...")
+            try:
+                await asyncio.to_thread(_download_tracker_radar)
+                age = 0
+            except Exception as e:
+                # Keep serving from the previous copy (or HTTP) and retry next cycle
+                logger.error("Tracker Radar download failed: %s", e)
+        if age is not None:
+            index = await asyncio.to_thread(_build_tracker_radar_index)
+            if len(index) >= TRACKER_RADAR_MIN_DOMAINS:
+                _tracker_radar_index = index
+                logger.info("Tracker Radar index loaded (%d domains).", len(index))
+            else:
+                # A near-empty copy would turn every lookup into a false negative
+                _tracker_radar_index = None
+                logger.error("Local Tracker Radar copy has only %d domains; using HTTP lookups.", len(index))
+        if age is None or age >= TRACKER_RADAR_MAX_AGE:
+            await asyncio.sleep(TRACKER_RADAR_RETRY_INTERVAL)
+        else:
+            await asyncio.sleep(TRACKER_RADAR_MAX_AGE - age)
+
+def _read_tracker_radar_entry(path: pathlib.Path, d: str):
+    try:
+        data = orjson.loads(path.read_bytes())
+    except (OSError, ValueError) as e:
+        logger.warning("  Could not read local Tracker Radar data for %s: %s", d, e)
+        return _FETCH_FAILED
+    # Ensure the 'domain' field is present, or use the queried domain 'd'
+    if "domain" not in data:
+        data["domain"] = d
+    return data
+
+async def _lookup_one(session: aiohttp.ClientSession, d: str) -> dict | None:
+    """
+    Cached lookup for a single domain: memory first, then the local tracker-radar
+    copy when it is loaded, otherwise the disk cache and finally the network.
+    404s are cached as None so known non-trackers aren't re-requested within
+    DDG_CACHE_TTL.
+    """
+    cached = _ddg_cache.get(d)
+    if cached and time.time() - cached[0] < DDG_CACHE_TTL:
+        return cached[1]
+
+    if _tracker_radar_index:
+        path = _tracker_radar_index.get(d)
+        data = None if path is None else await asyncio.to_thread(_read_tracker_radar_entry, path, d)
+        if data is not _FETCH_FAILED:
+            _remember(d, time.time(), data)
+            return data
+
+    cached = await asyncio.to_thread(_read_disk_cache, d)
+    if cached:
+        _remember(d, *cached)
+        return cached[1]
+
+    data = await _fetch_one(session, d)
+    if data is _FETCH_FAILED:
+        return None
+    _remember(d, time.time(), data)
+    await asyncio.to_thread(_write_disk_cache, d, data)
+    return data
+
+async def lookup_ddg_async(domains: list[str]) -> list[dict]:
+    """
+    Fetches DuckDuckGo tracker‐radar metadata for each domain present, concurrently.
     """
     hits = []
     if not domains:
         return hits
 
-    print(f"Looking up {len(domains)} domains against DuckDuckGo Tracker Radar.")
-    for d in domains:
-        # Construct the URL for the raw JSON data from DDG's tracker-radar repository
-        raw_url = f"https://raw.githubusercontent.com/duckduckgo/tracker-radar/main/domains/US/{d}.json"
-        try:
-            r = requests.get(raw_url, timeout=REQUESTS_TIMEOUT_DDG, headers={"User-Agent": USER_AGENT})
-            if r.status_code == 200:
-                data = r.json()
-                # Ensure the 'domain' field is present, or use the queried domain 'd'
-                if "domain" not in data:
-                    data["domain"] = d
-                hits.append(data)
-                print(f"  Found DDG data for: {d}")
-            elif r.status_code == 404:
-                print(f"  No DDG data for: {d} (404 Not Found)")
-            else:
-                print(f"  DDG lookup for {d} failed with status: {r.status_code}")
-        except requests.RequestException as e:
-            print(f"  Request failed for DDG data of {d}: {e}")
-            pass # Continue to the next domain if one fails
-    print(f"DDG lookup complete. Found details for {len(hits)} domains.")
+    logger.info("Looking up %d domains against DuckDuckGo Tracker Radar.", len(domains))
+    session = _get_ddg_session()
+
+    async def fetch(d):
+        async with _DDG_SEMAPHORE:
+            return await _lookup_one(session, d)
+
+    for next_hit in asyncio.as_completed([fetch(d) for d in domains]):
+        data = await next_hit
+        if data is None:
+            continue
+        hits.append(data)
+
+    logger.info("DDG lookup complete. Found details for %d domains.", len(hits))
     return hits
 
 # Updated HTML_TEMPLATE to include SocketIO integration
@@ -244,6 +653,15 @@ HTML_TEMPLATE = """
     <script>
         const socket = io();
 
+        let domainsFound = 0;
+
+        socket.on("domain_found", () => {
+            const loader = document.getElementById("loader");
+            domainsFound += 1;
+            loader.textContent = `Scanning... ${domainsFound} third-party domains found`;
+            loader.style.display = "block";
+        });
+
         socket.on("tracker_found", (tracker) => {
             addTrackerCard(tracker.domain, tracker.owner, tracker.categories, tracker.cookies);
         });
@@ -288,6 +706,13 @@ HTML_TEMPLATE = """
 </html>
 """
 
+# Parsed once at import instead of on every request. Built from Flask's Jinja
+# environment so HTML autoescaping matches render_template_string.
+_INDEX_TPL = app.jinja_env.from_string(HTML_TEMPLATE)
+# Without an error the page is fully static, so it is rendered and compressed once
+_INDEX_HTML = _INDEX_TPL.render(error=None).encode("utf-8")
+_INDEX_GZ = gzip.compress(_INDEX_HTML, compresslevel=9)
+
 @app.route("/", methods=["GET", "POST"])
 def index():
     error = None
@@ -297,22 +722,73 @@ def index():
             error = "URL cannot be empty. Please enter a URL."
         else:
             socketio.start_background_task(scan_url, url_to_scan)
-    return render_template_string(HTML_TEMPLATE, error=error)
+    if error:
+        return _INDEX_TPL.render(error=error)
+
+    if "gzip" in request.accept_encodings:
+        response = Response(_INDEX_GZ, content_type="text/html; charset=utf-8")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(_INDEX_HTML, content_type="text/html; charset=utf-8")
+    response.headers["Vary"] = "Accept-Encoding"
+    if request.method == "GET":
+        response.headers["Cache-Control"] = f"public, max-age={INDEX_CACHE_MAX_AGE}"
+    return response
+
+def prewarm_ddg_cache():
+    """
+    Fetches the bundled list of common tracker domains in the background so
+    early scans are served from cache.
+    """
+    domains = read_domain_list(TOP_TRACKERS_FILE)
+    asyncio.run_coroutine_threadsafe(lookup_ddg_async(domains), LOOP)
+
+def sync_tracker_radar():
+    """
+    Starts downloading and indexing the local tracker-radar copy in the background.
+    """
+    asyncio.run_coroutine_threadsafe(_load_tracker_radar(), LOOP)
+
+def emit_tracker(tracker: dict):
+    socketio.emit("tracker_found", {
+        "domain": tracker.get("domain", "Unknown"),
+        "owner": tracker.get("owner", {}).get("name", "Unknown"),
+        "categories": ", ".join(tracker.get("categories", [])),
+        "cookies": tracker.get("cookies", "N/A"),
+    })
+
+async def _scan_async(url: str):
+    """
+    Crawls url and looks up each third-party domain the moment it is discovered,
+    so crawling and DDG lookups overlap and results stream to the client.
+    """
+    session = _get_ddg_session()
+    lookups = []
+
+    async def lookup(d):
+        async with _DDG_SEMAPHORE:
+            tracker = await _lookup_one(session, d)
+        if tracker:
+            emit_tracker(tracker)
+
+    def on_domain(d):
+        socketio.emit("domain_found", {"domain": d})
+        lookups.append(asyncio.create_task(lookup(d)))
+
+    domains = await _extract_async(url, on_domain=on_domain)
+    await asyncio.gather(*lookups)
+    logger.info("Scan of %s complete. Looked up %d third-party domains.", url, len(domains))
 
 def scan_url(url):
     try:
-        third_party_domains = extract_third_party(url)
-        trackers = lookup_ddg(third_party_domains)
-        for tracker in trackers:
-            socketio.emit("tracker_found", {
-                "domain": tracker.get("domain", "Unknown"),
-                "owner": tracker.get("owner", {}).get("name", "Unknown"),
-                "categories": ", ".join(tracker.get("categories", [])),
-                "cookies": tracker.get("cookies", "N/A"),
-            })
+        asyncio.run_coroutine_threadsafe(_scan_async(url), LOOP).result()
     except Exception as e:
-        print(f"Error scanning URL {url}: {e}")
+        logger.error("Error scanning URL %s: %s", url, e)
 
 if __name__ == "__main__":
-    print("Starting Flask application with SocketIO...")
+    logger.info("Launching Playwright browser pool...")
+    start_browser_pool()
+    sync_tracker_radar()
+    prewarm_ddg_cache()
+    logger.info("Starting Flask application with SocketIO...")
     socketio.run(app, host="0.0.0.0", port=5005)
\ No newline at end of file